@@ -0,0 +1,333 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+import re
+import threading
+import pandas as pd
+
+from parsers import PostData, PresentationData, clean_post_id
+
+# Metrics rolled up for every dimension. Counts are summed, scores are summed so
+# that means can be derived without revisiting the posts.
+COUNT_METRICS = ['like_count', 'repost_count', 'impression_count']
+SCORE_METRICS = ['priority_score', 'engagement_score', 'urgency_score', 'amplifiability_score']
+
+# The display_output posts only carry the legacy engagement columns, so fall back
+# to them when the PostData field was left at its default.
+METRIC_FALLBACKS = {
+    'like_count': 'favorites',
+    'repost_count': 'retweets',
+}
+
+DIMENSIONS = ['user', 'hashtag', 'cluster', 'day']
+
+# Placeholder keys for posts that have no cluster / no post date
+UNCLUSTERED = 'unclustered'
+UNKNOWN_DAY = 'unknown'
+
+HASHTAG_PATTERN = re.compile(r"#(\w+)")
+
+@dataclass
+class MetricRollup:
+    count: int = 0
+    sums: Dict[str, float] = field(default_factory=lambda: {m: 0.0 for m in COUNT_METRICS + SCORE_METRICS})
+    # Multiset of priorities so the maximum survives retractions
+    priorities: Counter = field(default_factory=Counter)
+
+    def add(self, values: Dict[str, float]):
+        self.count += 1
+        for metric, value in values.items():
+            self.sums[metric] += value
+        self.priorities[values['priority_score']] += 1
+
+    def retract(self, values: Dict[str, float]):
+        """Undo a previous ``add`` with the same values"""
+        self.count -= 1
+        for metric, value in values.items():
+            self.sums[metric] -= value
+        priority = values['priority_score']
+        self.priorities[priority] -= 1
+        if self.priorities[priority] <= 0:
+            del self.priorities[priority]
+
+    @property
+    def max_priority(self) -> float:
+        return max(self.priorities) if self.priorities else 0.0
+
+    def copy(self) -> 'MetricRollup':
+        return MetricRollup(count=self.count, sums=dict(self.sums), priorities=Counter(self.priorities))
+
+    def mean(self, metric: str) -> float:
+        return self.sums[metric] / self.count if self.count else 0.0
+
+    def to_row(self) -> Dict[str, float]:
+        row = {'posts': self.count, 'max_priority': self.max_priority}
+        for metric in COUNT_METRICS:
+            row[metric] = self.sums[metric]
+        for metric in SCORE_METRICS:
+            row[f'avg_{metric}'] = self.mean(metric)
+        return row
+
+def post_metrics(post: PostData) -> Dict[str, float]:
+    """Return the rolled-up metric values for a single post"""
+    values = {}
+    for metric in COUNT_METRICS + SCORE_METRICS:
+        value = getattr(post, metric, 0) or 0
+        if not value and metric in METRIC_FALLBACKS:
+            value = getattr(post, METRIC_FALLBACKS[metric], 0) or 0
+        try:
+            values[metric] = float(value)
+        except (TypeError, ValueError):
+            values[metric] = 0.0
+    return values
+
+def post_user_key(post: PostData) -> str:
+    """Author identity, so every version of an author's profile rolls up together"""
+    return post.user.identity or 'anyuser'
+
+def post_hashtags(post: PostData) -> List[str]:
+    """Hashtags from the post's own list when present, otherwise extracted from the text"""
+    hashtags = getattr(post, 'hashtags', None)
+    if isinstance(hashtags, list) and hashtags:
+        return sorted({str(tag).lstrip('#').lower() for tag in hashtags if tag})
+    return sorted({tag.lower() for tag in HASHTAG_PATTERN.findall(post.text or '')})
+
+def post_day(post: PostData) -> str:
+    """Daily time bucket (YYYY-MM-DD) taken from the post creation date"""
+    created = getattr(post, 'post_created_at', None) or getattr(post, 'date', None)
+    if not created:
+        return UNKNOWN_DAY
+    return str(created)[:10]
+
+# Claim levels from clustered_claims mapped onto the 0-1 score range
+URGENCY_SCORES = {'Not urgent': 0.0, 'Moderately urgent': 0.5, 'Very urgent': 1.0}
+AMPLIFIABILITY_SCORES = {'Low': 0.0, 'Medium': 0.5, 'High': 1.0}
+
+def claim_post_metrics(post_row: Dict, claims: List[Dict]) -> Dict[str, float]:
+    """Metric values for a realData post from the `posts` table and its clustered claims.
+
+    Urgency and amplifiability are the strongest levels among the post's claims.
+    These posts have no upstream priority score, so priority is the mean of the two.
+    """
+    urgency = max([URGENCY_SCORES.get((c.get('classification') or {}).get('perceived_response_urgency'), 0.0)
+                   for c in claims] or [0.0])
+    amplifiability = max([AMPLIFIABILITY_SCORES.get((c.get('amplifiability') or {}).get('amplifiability_prediction'), 0.0)
+                          for c in claims] or [0.0])
+    return {
+        'like_count': float(post_row.get('favorites') or 0.0),
+        'repost_count': float(post_row.get('retweets') or 0.0),
+        'impression_count': 0.0,
+        'priority_score': (urgency + amplifiability) / 2,
+        'engagement_score': 0.0,
+        'urgency_score': urgency,
+        'amplifiability_score': amplifiability,
+    }
+
+# Contribution sources: analysed display_output posts feed the totals and the user and
+# hashtag rollups; the realData `posts` table joined with `clustered_claims` (which has
+# post dates and cluster assignments) feeds the cluster and day rollups.
+DISPLAY_SOURCE = 'display'
+CLAIMS_SOURCE = 'claims'
+
+class AggregateStore:
+    """Materialized per-user, per-hashtag, per-cluster and per-day rollups.
+
+    Each post's contribution is remembered by (source, post_id), so a re-ingested
+    post is applied as a retraction of its old values plus an add of the new ones,
+    and an unchanged post is skipped. ``sync`` pulls only display_output rows
+    written since the last sync, and re-keys the claim-backed posts when the
+    posts or clustered_claims tables change.
+
+    The store is shared between Streamlit sessions: every read and write holds
+    ``lock``, and readers get copies of the rollups.
+    """
+
+    def __init__(self):
+        self.rollups: Dict[str, Dict[str, MetricRollup]] = {dim: {} for dim in DIMENSIONS}
+        self.totals = MetricRollup()
+        # (source, post_id) -> (metric values, {dimension: keys}) currently folded in
+        self.contributions: Dict[Tuple[str, str], Tuple[Dict[str, float], Dict[str, List[str]]]] = {}
+        self.user_labels: Dict[str, str] = {}
+        # Numeric post id -> clusters its claims were assigned to
+        self.post_clusters: Dict[str, List[str]] = {}
+        # Store versions covered by the rollups (see sync)
+        self.revision = 0
+        self.generation = None
+        self.claims_version = None
+        self.lock = threading.RLock()
+
+    def _apply(self, source: str, values: Dict[str, float], keys: Dict[str, List[str]], retract: bool = False):
+        rollups = [self.rollups[dim].setdefault(key, MetricRollup())
+                   for dim, dim_keys in keys.items() for key in dim_keys]
+        if source == DISPLAY_SOURCE:
+            rollups.append(self.totals)
+        for rollup in rollups:
+            if retract:
+                rollup.retract(values)
+            else:
+                rollup.add(values)
+        if retract:
+            for dim, dim_keys in keys.items():
+                for key in dim_keys:
+                    if self.rollups[dim][key].count <= 0:
+                        del self.rollups[dim][key]
+
+    def _upsert(self, source: str, post_id: str, values: Dict[str, float], keys: Dict[str, List[str]]) -> bool:
+        contribution_key = (source, post_id)
+        previous = self.contributions.get(contribution_key)
+        if previous == (values, keys):
+            return False
+        if previous is not None:
+            self._apply(source, *previous, retract=True)
+        self._apply(source, values, keys)
+        self.contributions[contribution_key] = (values, keys)
+        return True
+
+    def _prune(self, source: str, present: set) -> int:
+        removed = 0
+        for contribution_key in [k for k in self.contributions if k[0] == source and k[1] not in present]:
+            self.remove(contribution_key[1], source)
+            removed += 1
+        return removed
+
+    def add(self, post: PostData) -> bool:
+        """Fold an analysed post into the totals and the user and hashtag rollups,
+        replacing its previous contribution if any.
+
+        Returns False when the post was already counted with identical values.
+        """
+        with self.lock:
+            keys = {'user': [post_user_key(post)], 'hashtag': post_hashtags(post)}
+            changed = self._upsert(DISPLAY_SOURCE, str(post.post_id), post_metrics(post), keys)
+            self.user_labels[keys['user'][0]] = post.user_name
+            return changed
+
+    def add_claim_post(self, post_row: Dict, claims: List[Dict]) -> bool:
+        """Fold a realData post and its clustered claims into the cluster and day rollups"""
+        with self.lock:
+            clusters = sorted({c['assigned_cluster'] for c in claims if c.get('assigned_cluster')}) or [UNCLUSTERED]
+            date = post_row.get('date')
+            keys = {'cluster': clusters, 'day': [str(date)[:10] if date else UNKNOWN_DAY]}
+            return self._upsert(CLAIMS_SOURCE, str(post_row['post_id']), claim_post_metrics(post_row, claims), keys)
+
+    def remove(self, post_id: str, source: str = DISPLAY_SOURCE) -> bool:
+        """Retract a post's contribution. Returns False if it was not counted."""
+        with self.lock:
+            previous = self.contributions.pop((source, str(post_id)), None)
+            if previous is None:
+                return False
+            self._apply(source, *previous, retract=True)
+            return True
+
+    def update(self, parsed_data: Iterable[Tuple[PresentationData, PostData]], prune: bool = False) -> int:
+        """Fold in new or changed analysed posts. Returns the number of posts that changed the rollups.
+
+        With ``prune`` the given posts are taken as the complete data set and any
+        other analysed post is retracted.
+        """
+        with self.lock:
+            changed = 0
+            present = set()
+            for _, post in parsed_data:
+                present.add(str(post.post_id))
+                if self.add(post):
+                    changed += 1
+            if prune:
+                changed += self._prune(DISPLAY_SOURCE, present)
+            return changed
+
+    def update_claims(self, post_rows: Iterable[Dict], claim_rows: Iterable[Dict]) -> int:
+        """Re-key the claim-backed posts from complete `posts` and `clustered_claims` rows.
+
+        Only posts whose clusters, date or metrics changed touch the rollups; posts
+        that are gone are retracted.
+        """
+        with self.lock:
+            claims_by_post: Dict[str, List[Dict]] = {}
+            for claim in claim_rows:
+                claims_by_post.setdefault(str(claim['post_id']), []).append(claim)
+            self.post_clusters = {
+                post_id: sorted({c['assigned_cluster'] for c in claims if c.get('assigned_cluster')})
+                for post_id, claims in claims_by_post.items()
+            }
+            changed = 0
+            present = set()
+            for post_row in post_rows:
+                post_id = str(post_row['post_id'])
+                present.add(post_id)
+                if self.add_claim_post(post_row, claims_by_post.get(post_id, [])):
+                    changed += 1
+            return changed + self._prune(CLAIMS_SOURCE, present)
+
+    def sync(self, store) -> int:
+        """Bring the rollups up to date with a LocalStore.
+
+        Only display_output rows written after the last sync are read. When that
+        table has been replaced wholesale (a new generation) every row is re-read
+        and posts that disappeared are retracted. A change to the posts or
+        clustered_claims tables re-reads both and re-keys the affected posts.
+        """
+        with self.lock:
+            changed = 0
+            revision, generation = store.display_output_version()
+            if revision != self.revision or generation != self.generation:
+                full = generation != self.generation
+                since = 0 if full else self.revision
+                changed += self.update(store.load_display_output(min_values={'revision': since + 1}), prune=full)
+                self.revision, self.generation = revision, generation
+
+            claims_version = (store.table_version('posts'), store.table_version('clustered_claims'))
+            if claims_version != self.claims_version:
+                changed += self.update_claims(store.query('posts'), store.query('clustered_claims'))
+                self.claims_version = claims_version
+            return changed
+
+    def get(self, dimension: str, key: str) -> MetricRollup:
+        """Copy of a single rollup (empty if the key is unknown)"""
+        with self.lock:
+            return self.rollups[dimension].get(key, MetricRollup()).copy()
+
+    def get_totals(self) -> MetricRollup:
+        """Copy of the rollup over all analysed posts"""
+        with self.lock:
+            return self.totals.copy()
+
+    def user_rollup(self, post: PostData) -> MetricRollup:
+        return self.get('user', post_user_key(post))
+
+    def cluster_priority(self, post: PostData) -> float:
+        """Highest mean priority among the clusters the post's claims belong to"""
+        with self.lock:
+            cluster_keys = self.post_clusters.get(clean_post_id(post.post_id)) or [UNCLUSTERED]
+            return max(self.rollups['cluster'].get(key, MetricRollup()).mean('priority_score')
+                       for key in cluster_keys)
+
+    def has_clusters(self) -> bool:
+        """Whether any claim-backed post was joined to a cluster"""
+        with self.lock:
+            return any(key != UNCLUSTERED for key in self.rollups['cluster'])
+
+    def has_days(self) -> bool:
+        """Whether any claim-backed post carried a post date"""
+        with self.lock:
+            return any(key != UNKNOWN_DAY for key in self.rollups['day'])
+
+    def joins_clusters(self, parsed_data: Iterable[Tuple[PresentationData, PostData]]) -> bool:
+        """Whether any analysed post has claims in clustered_claims"""
+        with self.lock:
+            return any(clean_post_id(post.post_id) in self.post_clusters for _, post in parsed_data)
+
+    def to_frame(self, dimension: str, sort_by: str = 'posts') -> pd.DataFrame:
+        """Return the rollups for a dimension as a DataFrame, largest first"""
+        with self.lock:
+            rows = []
+            for key, rollup in self.rollups[dimension].items():
+                row = {dimension: key}
+                if dimension == 'user':
+                    row['user_name'] = self.user_labels.get(key, key)
+                rows.append({**row, **rollup.to_row()})
+        if not rows:
+            return pd.DataFrame(columns=[dimension, 'posts'])
+        df = pd.DataFrame(rows)
+        ascending = dimension == 'day' and sort_by == dimension
+        return df.sort_values(sort_by, ascending=ascending).reset_index(drop=True)
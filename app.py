@@ -5,7 +5,9 @@ import pytz
 from supabase import create_client
 import json
 from st_aggrid import AgGrid, GridOptionsBuilder, JsCode
-from parsers import parse_display_output
+from parsers import clean_post_id
+from aggregates import AggregateStore
+from local_store import LocalStore
 import re
 
 # Initialize Supabase client
@@ -26,6 +28,23 @@ if 'logged_in' not in st.session_state:
 if 'username' not in st.session_state:
     st.session_state.username = None
 
+DISPLAY_OUTPUT_PATH = "newRealData/display_output.csv"
+
+@st.cache_resource
+def get_local_store():
+    """Open the local store shared by all sessions"""
+    return LocalStore()
+
+@st.cache_resource
+def get_aggregates():
+    """Rollups shared by all sessions, kept current with AggregateStore.sync"""
+    return AggregateStore()
+
+@st.cache_data
+def load_parsed_data(_store, revision, generation):
+    """Parsed display output, re-read from the store only when its version changes"""
+    return _store.load_display_output()
+
 # Login page
 def show_login():
     st.title("🔍 ClaimFinder")
@@ -50,8 +69,19 @@ def show_main_app():
     # Title
     st.title("🔍 ClaimFinder")
     
-    # Load and parse data
-    parsed_data = parse_display_output("newRealData/display_output.csv")
+    # Load parsed data from the local store (no network round trip)
+    store = get_local_store()
+    # Re-seed from the CSV whenever it changed since the store was last populated
+    store.refresh_display_output(DISPLAY_OUTPUT_PATH)
+    parsed_data = load_parsed_data(store, *store.display_output_version())
+
+    # Fold rows written since the last sync into the shared rollups; the posts and
+    # clustered_claims tables are populated by `loading_scripts/load_data.py --local`
+    aggregates = get_aggregates()
+    aggregates.sync(store)
+    # clustered_claims does not cover the display_output posts yet, so cluster
+    # sort orders are only offered once at least one of them joins a cluster
+    cluster_sorts = ["Cluster Priority"] if aggregates.joins_clusters(parsed_data) else []
     
     # User info in sidebar
     st.sidebar.header("User Information")
@@ -69,7 +99,7 @@ def show_main_app():
     )
     
     # Create tabs
-    tab1, tab2 = st.tabs(["All Posts", "AI-Sourced Posts"])
+    tab1, tab2, tab3 = st.tabs(["All Posts", "AI-Sourced Posts", "Summary"])
     
     # Tab 1: All Posts
     with tab1:
@@ -77,16 +107,16 @@ def show_main_app():
         
         # Search functionality
         search_term = st.text_input("Search posts by content:", key="simple_search")
+        sort_order = st.selectbox(
+            "Sort by:",
+            ["Priority", "Engagement", "Author Engagement"] + cluster_sorts,
+            key="posts_sort"
+        )
         
         # Prepare data for display
         posts_data = []
         for _, post in parsed_data:
-            raw_id = str(post.post_id)
-            # Strip common synthetic prefixes (e.g., original_ngt_, generated_gt_)
-            raw_id = re.sub(r"^(original_ngt_|generated_gt_)", "", raw_id)
-            # Extract numeric portion of the post ID (fallback to raw if no match)
-            match = re.search(r"\d{5,}", raw_id)  # long numeric chunk
-            clean_id = match.group(0) if match else raw_id
+            clean_id = clean_post_id(post.post_id)
 
             # Prefer user_handle, fallback to user_name, else 'anyuser'
             handle = getattr(post, 'user_handle', None) or getattr(post, 'user_name', None) or 'anyuser'
@@ -94,6 +124,7 @@ def show_main_app():
             handle = re.sub(r"[^A-Za-z0-9_]+", "", str(handle))
 
             url = f"https://x.com/{handle}/status/{clean_id}"
+            author = aggregates.user_rollup(post)
             posts_data.append({
                 'post_url': url,
                 'date': post.user_created,
@@ -103,14 +134,27 @@ def show_main_app():
                 'user_name': post.user_name,
                 'user_created': post.user_created,
                 'followers': post.user_followers,
-                'friends': post.user_friends
+                'friends': post.user_friends,
+                'priority': post.priority_score,
+                'engagement': post.retweets + post.favorites,
+                'author_engagement': author.sums['like_count'] + author.sums['repost_count'],
+                'cluster_priority': aggregates.cluster_priority(post)
             })
         
         posts_df = pd.DataFrame(posts_data)
-        
-        # Filter based on search
-        if search_term:
+
+        # Filter based on search (in memory: parsed_data is already cached for this store version)
+        if search_term and not posts_df.empty:
             posts_df = posts_df[posts_df['content'].str.contains(search_term, case=False, na=False)]
+
+        sort_columns = {
+            "Priority": 'priority',
+            "Engagement": 'engagement',
+            "Author Engagement": 'author_engagement',
+            "Cluster Priority": 'cluster_priority'
+        }
+        if not posts_df.empty:
+            posts_df = posts_df.sort_values(sort_columns[sort_order], ascending=False)
         
         # Configure grid
         gb = GridOptionsBuilder.from_dataframe(posts_df)
@@ -123,6 +167,10 @@ def show_main_app():
         gb.configure_column('user_created', header_name='Account Created')
         gb.configure_column('followers', header_name='Followers')
         gb.configure_column('friends', header_name='Following')
+        gb.configure_column('priority', header_name='Priority')
+        gb.configure_column('engagement', header_name='Engagement')
+        gb.configure_column('author_engagement', header_name='Author Engagement')
+        gb.configure_column('cluster_priority', header_name='Cluster Priority')
         
         gb.configure_default_column(resizable=True, filterable=True)
         grid_options = gb.build()
@@ -139,9 +187,20 @@ def show_main_app():
     with tab2:
         st.header("AI-Analyzed Claims")
         
-        # Show only posts with priority_score > 0.6 and sort by priority_score descending
+        ai_sort_order = st.selectbox(
+            "Sort by:",
+            ["Priority", "Author Priority"] + cluster_sorts,
+            key="ai_posts_sort"
+        )
+
+        # Show only posts with priority_score > 0.6, sorted descending by the selected priority
         ai_posts = [(pres, post) for pres, post in parsed_data if getattr(post, 'priority_score', 0) > 0.6]
-        ai_posts.sort(key=lambda x: -x[1].priority_score)
+        if ai_sort_order == "Author Priority":
+            ai_posts.sort(key=lambda x: (-aggregates.user_rollup(x[1]).mean('priority_score'), -x[1].priority_score))
+        elif ai_sort_order == "Cluster Priority":
+            ai_posts.sort(key=lambda x: (-aggregates.cluster_priority(x[1]), -x[1].priority_score))
+        else:
+            ai_posts.sort(key=lambda x: -x[1].priority_score)
         
         for presentation, post in ai_posts:
             with st.expander(f"{presentation.title} (Priority: {post.priority_score:.2f})"):
@@ -172,6 +231,37 @@ def show_main_app():
                 st.markdown(f"*{post.text}*")
                 st.markdown(f"Posted by: **{post.user_name}**")
 
+    # Tab 3: Summary dashboard backed by the materialized rollups
+    with tab3:
+        st.header("Engagement & Priority Summary")
+
+        totals = aggregates.get_totals()
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Posts", totals.count)
+        col2.metric("Likes", int(totals.sums['like_count']))
+        col3.metric("Reposts", int(totals.sums['repost_count']))
+        col4.metric("Avg Priority", f"{totals.mean('priority_score'):.2f}")
+
+        st.subheader("By Cluster")
+        if aggregates.has_clusters():
+            st.caption("Collected posts joined with their clustered claims")
+            st.dataframe(aggregates.to_frame('cluster', sort_by='max_priority'), use_container_width=True)
+        else:
+            st.info("No clustered claims in the local store yet; run `python load_data.py --local` in loading_scripts.")
+
+        st.subheader("Top Users")
+        st.dataframe(aggregates.to_frame('user').head(25), use_container_width=True)
+
+        st.subheader("Top Hashtags")
+        st.dataframe(aggregates.to_frame('hashtag').head(25), use_container_width=True)
+
+        st.subheader("By Day")
+        if aggregates.has_days():
+            st.caption("Collected posts by post date")
+            st.dataframe(aggregates.to_frame('day', sort_by='day'), use_container_width=True)
+        else:
+            st.info("No dated posts in the local store yet; run `python load_data.py --local` in loading_scripts.")
+
 # Main flow
 if not st.session_state.logged_in:
     show_login()
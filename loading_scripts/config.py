@@ -18,12 +18,46 @@ def delete_all_rows(table_name):
         supabase.table(table_name).delete().neq('cluster_name', '').execute()
     elif table_name == 'clustered_claims':
         supabase.table(table_name).delete().neq('claim_id', 'dummy').execute()
+    elif table_name == 'users':
+        supabase.table(table_name).delete().neq('user_key', 'dummy').execute()
     elif table_name == 'posts':
         supabase.table(table_name).delete().neq('post_id', 'dummy').execute()
     else:
         # For other tables that might have an id column
         supabase.table(table_name).delete().neq('id', 'dummy').execute()
 
+# Column used to identify a row in load error messages
+ROW_ID_COLUMNS = {
+    'cluster_presentations': 'cluster_name',
+    'clustered_claims': 'claim_id',
+    'posts': 'post_id',
+    'users': 'user_key',
+}
+
+def bulk_insert(table_name, rows, batch_size=500):
+    """Insert rows in batches instead of one request per row.
+
+    If a batch fails it is retried row by row so a single bad row only loses
+    itself; failures are logged. Returns the rows that were inserted.
+    """
+    id_column = ROW_ID_COLUMNS.get(table_name, 'id')
+    inserted = []
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        try:
+            supabase.table(table_name).insert(batch).execute()
+            inserted.extend(batch)
+            continue
+        except Exception as e:
+            print(f"Batch insert into {table_name} failed ({str(e)}), retrying row by row")
+        for row in batch:
+            try:
+                supabase.table(table_name).insert(row).execute()
+                inserted.append(row)
+            except Exception as e:
+                print(f"Failed to insert {table_name} row {row.get(id_column)}: {str(e)}")
+    return inserted
+
 def load_csv_data(file_path):
     """Load CSV data and handle JSON columns"""
     df = pd.read_csv(file_path)
@@ -1,12 +1,34 @@
 import os
+import sys
 import json
+import argparse
 from datetime import datetime
 import pytz
-from config import supabase, load_csv_data, delete_all_rows
+from config import supabase, load_csv_data, delete_all_rows, bulk_insert
 import pandas as pd
 import ast
 
-def load_cluster_presentations():
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from local_store import LocalStore, DEFAULT_STORE_PATH
+from parsers import UserRegistry
+
+def clear_table(table_name, store=None):
+    """Delete all rows from the local store when given, otherwise from Supabase"""
+    if store is not None:
+        store.delete_all_rows(table_name)
+    else:
+        delete_all_rows(table_name)
+
+def insert_rows(table_name, rows, store=None):
+    """Bulk insert rows into the local store when given, otherwise into Supabase.
+
+    Returns the rows that were inserted.
+    """
+    if store is not None:
+        return store.insert_rows(table_name, rows)
+    return bulk_insert(table_name, rows)
+
+def load_cluster_presentations(store=None):
     """Load cluster presentations data"""
     print("Loading cluster presentations...")
     
@@ -15,7 +37,7 @@ def load_cluster_presentations():
     df = df.fillna('')  # Fill NaN values with empty string
     
     # Delete existing data
-    delete_all_rows('cluster_presentations')
+    clear_table('cluster_presentations', store)
     
     # Function to safely parse JSON string
     def parse_json_string(value):
@@ -35,7 +57,8 @@ def load_cluster_presentations():
             print(f"Error parsing JSON: {str(e)}")
             return {"items": []}
 
-    # Insert data
+    # Build rows
+    rows = []
     for _, row in df.iterrows():
         try:
             data = {
@@ -50,30 +73,34 @@ def load_cluster_presentations():
                 'key_findings.findings': parse_json_string(row['key_findings.findings']),
                 'recommended_actions.recommendations': parse_json_string(row['recommended_actions.recommendations'])
             }
-            
-            supabase.table('cluster_presentations').insert(data).execute()
-            print(f"Successfully inserted cluster presentation: {data['cluster_name']}")
+            rows.append(data)
         except Exception as e:
-            print(f"Error inserting cluster presentation: {str(e)}")
+            print(f"Error preparing cluster presentation: {str(e)}")
             continue
 
-    print("Cluster presentations loaded successfully")
-    return df['cluster_name'].tolist()
+    inserted = insert_rows('cluster_presentations', rows, store)
+    print(f"Cluster presentations loaded successfully. Loaded {len(inserted)} presentations.")
+    return [row['cluster_name'] for row in inserted]
 
-def load_posts():
+def load_posts(store=None):
     """Load posts data"""
     print("Loading posts...")
     
     # Load and preprocess data
     df = load_csv_data('../realData/posts.csv')
     
-    # Delete existing data
-    delete_all_rows('posts')
+    # Delete existing data (posts reference users)
+    clear_table('posts', store)
+    clear_table('users', store)
     
-    # Keep track of successfully loaded post_ids
-    loaded_post_ids = []
+    # Keep track of successfully prepared post_ids
+    prepared_post_ids = []
+    rows = []
+    # Each distinct author profile is uploaded once to `users` (see
+    # migrations/001_users.sql); posts carry only the user_key
+    users = UserRegistry()
     
-    # Insert new data
+    # Build new data
     for _, row in df.iterrows():
         try:
             # Keep timestamps as ISO format strings
@@ -105,16 +132,19 @@ def load_posts():
             except:
                 hashtags = []
             
-            data = {
-                'post_id': str(row['post_id']),
+            profile = {
                 'user_name': str(row['user_name']) if pd.notna(row['user_name']) else None,
                 'user_location': str(row['user_location']) if pd.notna(row['user_location']) else None,
                 'user_description': str(row['user_description']) if pd.notna(row['user_description']) else None,
                 'user_created': user_created,
+                'user_verified': user_verified
+            }
+            
+            data = {
+                'post_id': str(row['post_id']),
                 'user_followers': user_followers,
                 'user_friends': user_friends,
                 'user_favourites': user_favourites,
-                'user_verified': user_verified,
                 'date': date,
                 'text': str(row['text']) if pd.notna(row['text']) else None,
                 'hashtags': hashtags,
@@ -125,16 +155,19 @@ def load_posts():
                 'spam_score': spam_score,
                 'spam_classification': str(row['spam_classification']) if pd.notna(row['spam_classification']) else None
             }
-            
-            supabase.table('posts').insert(data).execute()
-            loaded_post_ids.append(row['post_id'])
+            data['user_key'] = users.intern(profile).key
+            rows.append(data)
+            prepared_post_ids.append(row['post_id'])
         except Exception as e:
             print(f"Failed to load post {row['post_id']}: {str(e)}")
     
-    print(f"Posts loaded successfully. Loaded {len(loaded_post_ids)} posts.")
+    insert_rows('users', [user.to_row() for user in users.users.values()], store)
+    inserted_ids = {data['post_id'] for data in insert_rows('posts', rows, store)}
+    loaded_post_ids = [post_id for post_id in prepared_post_ids if str(post_id) in inserted_ids]
+    print(f"Posts loaded successfully. Loaded {len(loaded_post_ids)} posts from {len(users)} user profiles.")
     return loaded_post_ids
 
-def load_clustered_claims(valid_post_ids, valid_clusters):
+def load_clustered_claims(valid_post_ids, valid_clusters, store=None):
     """Load clustered claims data"""
     print("Loading clustered claims...")
     
@@ -162,9 +195,10 @@ def load_clustered_claims(valid_post_ids, valid_clusters):
     ]
     
     # Delete existing data
-    delete_all_rows('clustered_claims')
+    clear_table('clustered_claims', store)
     
-    # Insert data
+    # Build rows
+    rows = []
     for _, row in df.iterrows():
         try:
             data = {
@@ -189,32 +223,45 @@ def load_clustered_claims(valid_post_ids, valid_clusters):
                 'amplifiability': parse_json_string(row['amplifiability']),
                 'assigned_cluster': row['assigned_cluster']
             }
-            
-            supabase.table('clustered_claims').insert(data).execute()
-            print(f"Successfully inserted claim: {data['claim_id']}")
+            rows.append(data)
         except Exception as e:
             print(f"Failed to load claim {row['claim_id']}: {str(e)}")
             continue
     
-    print(f"Clustered claims loaded successfully. Loaded {len(df)} claims.")
+    inserted = insert_rows('clustered_claims', rows, store)
+    print(f"Clustered claims loaded successfully. Loaded {len(inserted)} claims.")
+
+def load_display_output(store):
+    """Parse display_output.csv into the local store (not mirrored in Supabase)"""
+    print("Loading display output...")
+    store.refresh_display_output('../newRealData/display_output.csv', force=True)
+    count = store.count('display_output')
+    print(f"Display output loaded successfully. Loaded {count} rows.")
 
-def main():
-    """Main function to load all data"""
+def main(store=None):
+    """Main function to load all data into Supabase, or into the local store when given"""
     print("Starting data load...")
     
     # First delete all data in reverse order of dependencies
     print("Deleting existing data...")
-    delete_all_rows('clustered_claims')  # Delete child table first
-    delete_all_rows('posts')  # Delete independent table
-    delete_all_rows('cluster_presentations')  # Delete parent table last
+    clear_table('clustered_claims', store)  # Delete child table first
+    clear_table('posts', store)  # Delete posts before the users they reference
+    clear_table('users', store)
+    clear_table('cluster_presentations', store)  # Delete parent table last
     
     # Then load new data in order of dependencies
     print("Loading new data...")
-    valid_clusters = load_cluster_presentations()  # Load parent table first
-    valid_post_ids = load_posts()  # Load independent table
-    load_clustered_claims(valid_post_ids, valid_clusters)  # Load child table last with valid IDs
+    valid_clusters = load_cluster_presentations(store)  # Load parent table first
+    valid_post_ids = load_posts(store)  # Load independent table
+    load_clustered_claims(valid_post_ids, valid_clusters, store)  # Load child table last with valid IDs
+    if store is not None:
+        load_display_output(store)
     
     print("All data loaded successfully!")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Load realData CSVs into Supabase or a local SQLite store")
+    parser.add_argument('--local', nargs='?', const=DEFAULT_STORE_PATH, default=None, metavar='PATH',
+                        help=f"load into the local store instead of Supabase (default path: {DEFAULT_STORE_PATH})")
+    args = parser.parse_args()
+    main(LocalStore(args.local) if args.local else None) 
\ No newline at end of file
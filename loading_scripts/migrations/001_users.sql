@@ -0,0 +1,25 @@
+-- Author profiles are stored once in `users` and referenced from posts by user_key.
+-- user_key is the author identity (handle, or "name|account creation time" when the
+-- scrape has no handle) plus a hash of the profile contents, so each distinct version
+-- of a profile is one row (see parsers.UserProfile.key).
+-- Counts that change over time (followers, friends, favourites) stay on posts.
+
+CREATE TABLE IF NOT EXISTS users (
+    user_key TEXT PRIMARY KEY,
+    user_handle TEXT,
+    user_name TEXT,
+    user_verified BOOLEAN,
+    user_location TEXT,
+    user_description TEXT,
+    user_created_at TEXT
+);
+
+ALTER TABLE posts ADD COLUMN IF NOT EXISTS user_key TEXT REFERENCES users (user_key);
+CREATE INDEX IF NOT EXISTS idx_posts_user_key ON posts (user_key);
+
+ALTER TABLE posts
+    DROP COLUMN IF EXISTS user_name,
+    DROP COLUMN IF EXISTS user_location,
+    DROP COLUMN IF EXISTS user_description,
+    DROP COLUMN IF EXISTS user_created,
+    DROP COLUMN IF EXISTS user_verified;
@@ -0,0 +1,418 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from dataclasses import asdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from parsers import (PostData, PresentationData, PostFindings, KeyFinding,
+                     FactCheckerRecommendations, RecommendedAction, UserProfile, UserRegistry,
+                     parse_display_output)
+
+# Default location of the embedded store, relative to the repository root
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'localData', 'claimfinder.db')
+
+# Bumped whenever TABLES changes; older stores are dropped and rebuilt
+SCHEMA_VERSION = 6
+
+# Table layouts mirror the Supabase tables populated by loading_scripts/load_data.py.
+# JSON columns hold lists/dicts serialised as text. Author profiles live once in
+# `users` and are referenced by `user_key` (see parsers.UserProfile.key).
+TABLES = {
+    # Store bookkeeping, e.g. the display_output revision and generation counters
+    'meta': {
+        'columns': [
+            ('key', 'TEXT PRIMARY KEY'),
+            ('value', 'TEXT'),
+        ],
+        'indexes': [],
+    },
+    'users': {
+        'columns': [
+            ('user_key', 'TEXT PRIMARY KEY'),
+            ('user_handle', 'TEXT'),
+            ('user_name', 'TEXT'),
+            ('user_verified', 'BOOLEAN'),
+            ('user_location', 'TEXT'),
+            ('user_description', 'TEXT'),
+            ('user_created_at', 'TEXT'),
+        ],
+        'indexes': [],
+    },
+    'posts': {
+        'columns': [
+            ('post_id', 'TEXT PRIMARY KEY'),
+            ('user_key', 'TEXT'),
+            # Author counts as of the post; the profile itself is in `users`
+            ('user_followers', 'INTEGER'),
+            ('user_friends', 'INTEGER'),
+            ('user_favourites', 'INTEGER'),
+            ('date', 'TEXT'),
+            ('text', 'TEXT'),
+            ('hashtags', 'JSON'),
+            ('source', 'TEXT'),
+            ('retweets', 'REAL'),
+            ('favorites', 'REAL'),
+            ('is_retweet', 'BOOLEAN'),
+            ('spam_score', 'REAL'),
+            ('spam_classification', 'TEXT'),
+        ],
+        'indexes': [['date'], ['user_key']],
+    },
+    'clustered_claims': {
+        'columns': [
+            ('claim_id', 'TEXT PRIMARY KEY'),
+            ('post_id', 'TEXT'),
+            ('claim', 'TEXT'),
+            ('confidence', 'REAL'),
+            ('location', 'TEXT'),
+            ('requires_additional_context', 'BOOLEAN'),
+            ('reasoning', 'TEXT'),
+            ('context_flags', 'JSON'),
+            ('context_explanations', 'JSON'),
+            ('search_queries_recommended', 'JSON'),
+            ('extracted_entities', 'JSON'),
+            ('famous_entities_identified', 'BOOLEAN'),
+            ('entity_resolution_summary', 'TEXT'),
+            ('is_famous_poster', 'BOOLEAN'),
+            ('process', 'TEXT'),
+            ('status', 'TEXT'),
+            ('message', 'TEXT'),
+            ('classification', 'JSON'),
+            ('amplifiability', 'JSON'),
+            ('assigned_cluster', 'TEXT'),
+        ],
+        'indexes': [['post_id'], ['assigned_cluster']],
+    },
+    'cluster_presentations': {
+        'columns': [
+            ('cluster_name', 'TEXT PRIMARY KEY'),
+            ('process', 'TEXT'),
+            ('status', 'TEXT'),
+            ('message', 'TEXT'),
+            ('cluster_summary.summary', 'TEXT'),
+            ('similar_fact_checks.fact_checks', 'JSON'),
+            ('cluster_priority.level', 'TEXT'),
+            ('cluster_priority.rationale', 'TEXT'),
+            ('key_findings.findings', 'JSON'),
+            ('recommended_actions.recommendations', 'JSON'),
+        ],
+        'indexes': [['cluster_priority.level']],
+    },
+    # Parsed newRealData/display_output.csv: one row per (presentation, post) pair.
+    # Keyed by a surrogate row_id so repeated post ids keep every row, as the CSV does.
+    'display_output': {
+        'columns': [
+            ('row_id', 'INTEGER PRIMARY KEY AUTOINCREMENT'),
+            ('post_id', 'TEXT'),
+            ('title', 'TEXT'),
+            ('key_findings', 'JSON'),
+            ('recommended_actions', 'JSON'),
+            ('process', 'TEXT'),
+            ('status', 'TEXT'),
+            ('message', 'TEXT'),
+            ('priority_score', 'REAL'),
+            ('date', 'TEXT'),
+            ('text', 'TEXT'),
+            ('user_key', 'TEXT'),
+            ('post', 'JSON'),
+            # save_display_output call that last wrote the row (see display_output_version)
+            ('revision', 'INTEGER'),
+        ],
+        'indexes': [['post_id'], ['priority_score'], ['date'], ['user_key'], ['revision']],
+    },
+}
+
+def _quote(name: str) -> str:
+    """Quote an identifier (Supabase column names contain dots)"""
+    return '"' + name.replace('"', '""') + '"'
+
+def _search_match(pattern: str, value: Optional[str]) -> bool:
+    """SQL ``search_match(pattern, column)``: same semantics as pandas
+    ``str.contains(pattern, case=False)`` (Unicode-aware, regex), falling back to a
+    literal case-insensitive substring when the pattern is not a valid regex."""
+    if value is None:
+        return False
+    try:
+        return re.search(pattern, value, re.IGNORECASE) is not None
+    except re.error:
+        return pattern.casefold() in value.casefold()
+
+def source_signature(path: str) -> str:
+    """Cheap change marker for a source file (modification time and size)"""
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+class LocalStore:
+    """Embedded SQLite mirror of the Supabase tables plus the parsed display output"""
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.create_function('search_match', 2, _search_match, deterministic=True)
+        # The connection is shared by every Streamlit session thread, so all access
+        # goes through this lock (re-entrant: composite operations nest calls)
+        self.lock = threading.RLock()
+        self.create_schema()
+
+    def create_schema(self):
+        """Create all tables and indexes if they do not exist yet"""
+        with self.lock, self.conn:
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                for table in TABLES:
+                    self.conn.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+                self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            for table, spec in TABLES.items():
+                columns = ', '.join(f"{_quote(name)} {col_type}" for name, col_type in spec['columns'])
+                self.conn.execute(f"CREATE TABLE IF NOT EXISTS {_quote(table)} ({columns})")
+                for index_columns in spec['indexes']:
+                    index_name = 'idx_' + table + '_' + '_'.join(c.replace('.', '_') for c in index_columns)
+                    self.conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS {_quote(index_name)} ON {_quote(table)} "
+                        f"({', '.join(_quote(c) for c in index_columns)})"
+                    )
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def is_empty(self, table: str) -> bool:
+        with self.lock:
+            return self.conn.execute(f"SELECT 1 FROM {_quote(table)} LIMIT 1").fetchone() is None
+
+    def count(self, table: str) -> int:
+        with self.lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM {_quote(table)}").fetchone()[0]
+
+    def delete_all_rows(self, table: str):
+        with self.lock, self.conn:
+            self.conn.execute(f"DELETE FROM {_quote(table)}")
+            self._bump_table_version(table)
+
+    def _bump_table_version(self, table: str):
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, '1') "
+            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1",
+            (f'{table}_version',))
+
+    def table_version(self, table: str) -> int:
+        """Counter bumped by every insert_rows / delete_all_rows call on ``table``"""
+        return int(self.get_meta(f'{table}_version', 0))
+
+    def insert_rows(self, table: str, rows: List[Dict[str, Any]], batch_size: int = 500) -> List[Dict[str, Any]]:
+        """Bulk insert (or replace) rows, one transaction per batch.
+
+        If a batch fails it is retried row by row so a single bad row only loses
+        itself; failures are logged. Returns the rows that were inserted.
+        """
+        if not rows:
+            return []
+        spec = TABLES[table]['columns']
+        names = [name for name, _ in spec]
+        json_columns = {name for name, col_type in spec if col_type == 'JSON'}
+
+        def encode(name, value):
+            if name in json_columns:
+                return json.dumps(value) if value is not None else None
+            return value
+
+        sql = (f"INSERT OR REPLACE INTO {_quote(table)} ({', '.join(_quote(n) for n in names)}) "
+               f"VALUES ({', '.join('?' for _ in names)})")
+        id_column = next((name for name, col_type in spec if 'PRIMARY KEY' in col_type), names[0])
+        inserted = []
+        with self.lock:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                try:
+                    with self.conn:
+                        self.conn.executemany(sql, ([encode(n, row.get(n)) for n in names] for row in batch))
+                    inserted.extend(batch)
+                    continue
+                except (sqlite3.Error, TypeError, ValueError) as e:
+                    print(f"Batch insert into {table} failed ({str(e)}), retrying row by row")
+                for row in batch:
+                    try:
+                        with self.conn:
+                            self.conn.execute(sql, [encode(n, row.get(n)) for n in names])
+                        inserted.append(row)
+                    except (sqlite3.Error, TypeError, ValueError) as e:
+                        print(f"Failed to insert {table} row {row.get(id_column)}: {str(e)}")
+            if inserted:
+                with self.conn:
+                    self._bump_table_version(table)
+        return inserted
+
+    def query(self, table: str,
+              filters: Optional[Dict[str, Any]] = None,
+              min_values: Optional[Dict[str, Any]] = None,
+              max_values: Optional[Dict[str, Any]] = None,
+              search: Optional[Tuple[str, str]] = None,
+              order_by: Optional[str] = None,
+              descending: bool = True,
+              limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Query a table with the filters pushed down into SQL.
+
+        ``filters`` are equality matches (a list/tuple value becomes ``IN``),
+        ``min_values``/``max_values`` are inclusive range bounds and ``search``
+        is a ``(column, pattern)`` case-insensitive regex match (see ``_search_match``).
+        """
+        spec = TABLES[table]['columns']
+        json_columns = {name for name, col_type in spec if col_type == 'JSON'}
+        clauses, params = [], []
+
+        for column, value in (filters or {}).items():
+            if isinstance(value, (list, tuple, set)):
+                values = list(value)
+                if not values:
+                    return []
+                clauses.append(f"{_quote(column)} IN ({', '.join('?' for _ in values)})")
+                params.extend(values)
+            else:
+                clauses.append(f"{_quote(column)} = ?")
+                params.append(value)
+        for column, value in (min_values or {}).items():
+            clauses.append(f"{_quote(column)} >= ?")
+            params.append(value)
+        for column, value in (max_values or {}).items():
+            clauses.append(f"{_quote(column)} <= ?")
+            params.append(value)
+        if search and search[1]:
+            clauses.append(f"search_match(?, {_quote(search[0])})")
+            params.append(search[1])
+
+        sql = f"SELECT * FROM {_quote(table)}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        if order_by:
+            sql += f" ORDER BY {_quote(order_by)} {'DESC' if descending else 'ASC'}"
+            if table == 'display_output':
+                sql += ", row_id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        with self.lock:
+            records = self.conn.execute(sql, params).fetchall()
+        rows = []
+        for record in records:
+            row = dict(record)
+            for column in json_columns:
+                if row.get(column) is not None:
+                    row[column] = json.loads(row[column])
+            rows.append(row)
+        return rows
+
+    def get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        with self.lock:
+            row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: Any):
+        with self.lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, str(value)))
+
+    def display_output_version(self) -> Tuple[int, int]:
+        """Return (revision, generation) of the display_output table.
+
+        The revision increases with every save_display_output call and stamps the
+        rows it wrote; the generation increases whenever the table is replaced.
+        """
+        return int(self.get_meta('display_output_revision', 0)), int(self.get_meta('display_output_generation', 0))
+
+    def save_users(self, profiles: Iterable[UserProfile]) -> int:
+        """Store each distinct author profile version once.
+
+        user_key includes a hash of the profile contents, so a key already in the
+        table holds the same values and replacing it changes nothing.
+        """
+        rows = {}
+        for profile in profiles:
+            rows.setdefault(profile.key, profile.to_row())
+        return len(self.insert_rows('users', list(rows.values())))
+
+    def load_users(self, user_keys: Optional[Iterable[str]] = None) -> Dict[str, UserProfile]:
+        """Return profiles by user_key, restricted to ``user_keys`` when given"""
+        filters = {'user_key': sorted(set(user_keys))} if user_keys is not None else None
+        users = UserRegistry()
+        for row in self.query('users', filters=filters):
+            users.intern(row)
+        return users.users
+
+    def save_display_output(self, parsed_data: Iterable[Tuple[PresentationData, PostData]]) -> int:
+        """Store the output of parsers.parse_display_output under a new revision"""
+        parsed_data = list(parsed_data)
+        rows = []
+        with self.lock:
+            self.save_users(post.user for _, post in parsed_data)
+            revision = self.display_output_version()[0] + 1
+            for presentation, post in parsed_data:
+                post_dict = dict(vars(post))
+                del post_dict['user']
+                rows.append({
+                    'post_id': str(post.post_id),
+                    'title': presentation.title,
+                    'key_findings': [asdict(f) for f in presentation.key_findings.findings],
+                    'recommended_actions': [asdict(a) for a in presentation.recommended_actions.recommendations],
+                    'process': presentation.process,
+                    'status': presentation.status,
+                    'message': presentation.message,
+                    'priority_score': post.priority_score,
+                    'date': post.post_created_at or post_dict.get('date') or None,
+                    'text': post.text,
+                    'user_key': post.user.key,
+                    'post': post_dict,
+                    'revision': revision,
+                })
+            count = len(self.insert_rows('display_output', rows))
+            self.set_meta('display_output_revision', revision)
+        return count
+
+    def replace_display_output(self, parsed_data: Iterable[Tuple[PresentationData, PostData]]) -> int:
+        """Replace the whole display_output table and start a new generation"""
+        with self.lock:
+            self.delete_all_rows('display_output')
+            self.set_meta('display_output_generation', self.display_output_version()[1] + 1)
+            return self.save_display_output(parsed_data)
+
+    def refresh_display_output(self, path: str, force: bool = False) -> bool:
+        """Re-seed display_output from ``path`` when the file changed since the last seed.
+
+        Returns True when the table was replaced.
+        """
+        with self.lock:
+            signature = source_signature(path)
+            if not force and self.get_meta('display_output_source') == signature:
+                return False
+            self.replace_display_output(parse_display_output(path))
+            self.set_meta('display_output_source', signature)
+            return True
+
+    def load_display_output(self, **query_kwargs) -> List[Tuple[PresentationData, PostData]]:
+        """Rebuild (presentation, post) pairs, accepting the same pushed-down filters as ``query``"""
+        query_kwargs.setdefault('order_by', 'priority_score')
+        rows = self.query('display_output', **query_kwargs)
+        users = self.load_users(row['user_key'] for row in rows)
+        parsed_data = []
+        for row in rows:
+            presentation = PresentationData(
+                title=row['title'] or '',
+                key_findings=PostFindings(findings=[KeyFinding(**f) for f in row['key_findings'] or []]),
+                recommended_actions=FactCheckerRecommendations(
+                    recommendations=[RecommendedAction(**a) for a in row['recommended_actions'] or []]
+                ),
+                process=row['process'] or '',
+                status=row['status'] or '',
+                message=row['message'],
+            )
+            post_dict = row['post'] or {}
+            post = PostData.parse_from_dict({**post_dict, 'user': users.get(row['user_key'])})
+            # Restore the extra fields parse_display_output attaches beyond the dataclass
+            for k, v in post_dict.items():
+                if not hasattr(post, k):
+                    setattr(post, k, v)
+            parsed_data.append((presentation, post))
+        return parsed_data
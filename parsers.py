@@ -4,6 +4,8 @@ from datetime import datetime
 import ast
 import json
 import re
+import hashlib
+import sys
 import pandas as pd
 
 @dataclass
@@ -71,20 +73,100 @@ class PresentationData:
         )
 
 @dataclass
-class PostData:
-    post_id: str
-    text: str
-    # Legacy alias (no default to keep dataclass field ordering constraints)
-    post_text: str
-    user_name: str
+class UserProfile:
+    """Author identity and bio as scraped with a post. Counts that change over time
+    (followers, following, statuses, favourites) stay on each PostData as of that post."""
     user_handle: str
+    user_name: str
     user_verified: bool
     user_location: str
     user_description: str
-    user_followers_count: int
-    user_following_count: int
-    user_statuses_count: int
     user_created_at: str
+
+    @property
+    def identity(self) -> str:
+        return user_key(self.user_handle, self.user_name, self.user_created_at)
+
+    @property
+    def key(self) -> str:
+        """Identity plus a hash of the profile contents.
+
+        Bios and locations change over time, so each distinct version of an
+        author's profile is stored once and posts point at the version they
+        were scraped with.
+        """
+        content = '\x1f'.join(str(getattr(self, f)) for f in USER_FIELDS)
+        return f"{self.identity}#{hashlib.sha1(content.encode('utf-8')).hexdigest()[:12]}"
+
+    def to_row(self) -> Dict[str, Any]:
+        """Flat row for the shared `users` table"""
+        return {'user_key': self.key, **{f: getattr(self, f) for f in USER_FIELDS}}
+
+USER_FIELDS = ['user_handle', 'user_name', 'user_verified', 'user_location', 'user_description',
+               'user_created_at']
+
+# Legacy realData / display_output column name for the profile creation date
+USER_FIELD_ALIASES = {
+    'user_created': 'user_created_at',
+}
+
+# Per-post author counts and their legacy realData / display_output column names
+USER_COUNT_FIELDS = ['user_followers_count', 'user_following_count', 'user_statuses_count',
+                     'user_favourites_count']
+USER_COUNT_ALIASES = {
+    'user_followers': 'user_followers_count',
+    'user_friends': 'user_following_count',
+    'user_favourites': 'user_favourites_count',
+}
+
+def user_key(handle: str, name: str, created_at: str) -> str:
+    """Identity of an author: the handle when known, otherwise display name plus
+    account creation time (the realData CSVs carry no handle, and display names
+    are not unique)."""
+    return handle or f"{name}|{created_at}"
+
+class UserRegistry:
+    """Table of author profile versions keyed by ``UserProfile.key``.
+
+    Posts with identical author profiles reference a single UserProfile instead
+    of each carrying a copy of the bio and location, and the string fields are
+    interned so equal values share one object. Create one registry per parse or load.
+    """
+
+    def __init__(self):
+        self.users: Dict[str, UserProfile] = {}
+
+    def intern(self, data: Dict[str, Any]) -> UserProfile:
+        """Return the shared profile for the author described by ``data``, adding it if new.
+
+        ``data`` may use either the UserProfile field names or the legacy aliases.
+        """
+        fields = {
+            'user_handle': '', 'user_name': '', 'user_verified': False, 'user_location': '',
+            'user_description': '', 'user_created_at': ''
+        }
+        for key, value in data.items():
+            key = USER_FIELD_ALIASES.get(key, key)
+            if key not in fields or value is None or (isinstance(value, float) and value != value):
+                continue
+            if key == 'user_verified':
+                fields[key] = value.lower() == 'true' if isinstance(value, str) else bool(value)
+            else:
+                fields[key] = sys.intern(str(value))
+
+        profile = UserProfile(**fields)
+        return self.users.setdefault(profile.key, profile)
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+@dataclass
+class PostData:
+    post_id: str
+    text: str
+    # Legacy alias (no default to keep dataclass field ordering constraints)
+    post_text: str
+    user: UserProfile
     post_created_at: str
     repost_count: int
     reply_count: int
@@ -100,23 +182,66 @@ class PostData:
     emotional_tone: str
     is_checkworthy: bool
     has_checkworthy_claims: bool = False
-    
+    # Author counts as of this post
+    user_followers_count: int = 0
+    user_following_count: int = 0
+    user_statuses_count: int = 0
+    user_favourites_count: int = 0
+
+    # Author identity fields are read through the shared profile (including the legacy names)
+    @property
+    def user_name(self) -> str:
+        return self.user.user_name
+
+    @property
+    def user_handle(self) -> str:
+        return self.user.user_handle
+
+    @property
+    def user_verified(self) -> bool:
+        return self.user.user_verified
+
+    @property
+    def user_location(self) -> str:
+        return self.user.user_location
+
+    @property
+    def user_description(self) -> str:
+        return self.user.user_description
+
+    @property
+    def user_created_at(self) -> str:
+        return self.user.user_created_at
+
+    @property
+    def user_created(self) -> str:
+        return self.user.user_created_at
+
+    @property
+    def user_followers(self) -> int:
+        return self.user_followers_count
+
+    @property
+    def user_friends(self) -> int:
+        return self.user_following_count
+
+    @property
+    def user_favourites(self) -> int:
+        return self.user_favourites_count
+
     @classmethod
-    def parse_from_dict(cls, data: Dict[str, Any]) -> 'PostData':
+    def parse_from_dict(cls, data: Dict[str, Any], users: Optional[UserRegistry] = None) -> 'PostData':
+        # Author profile fields go to the registry; the post keeps a reference
+        users = users if users is not None else UserRegistry()
+        user = data.get('user')
+        if not isinstance(user, UserProfile):
+            user = users.intern({k: v for k, v in data.items() if k in USER_FIELDS or k in USER_FIELD_ALIASES})
+
         # Initialize with default values
         default_data = {
             'post_id': '',
             'text': '',
             'post_text': '',
-            'user_name': '',
-            'user_handle': '',
-            'user_verified': False,
-            'user_location': '',
-            'user_description': '',
-            'user_followers_count': 0,
-            'user_following_count': 0,
-            'user_statuses_count': 0,
-            'user_created_at': '',
             'post_created_at': '',
             'repost_count': 0,
             'reply_count': 0,
@@ -131,11 +256,16 @@ class PostData:
             'top_claims': [],
             'emotional_tone': '',
             'is_checkworthy': False,
-            'has_checkworthy_claims': False
+            'has_checkworthy_claims': False,
+            'user_followers_count': 0,
+            'user_following_count': 0,
+            'user_statuses_count': 0,
+            'user_favourites_count': 0
         }
         
         # Update with provided data
         for key, value in data.items():
+            key = USER_COUNT_ALIASES.get(key, key)
             if key in default_data:
                 # Handle special cases
                 if key == 'top_claims':
@@ -159,20 +289,12 @@ class PostData:
                         default_data[key] = float(value) if value is not None else 0.0
                     except:
                         default_data[key] = 0.0
-                elif key in ['user_followers_count', 'user_following_count', 'user_statuses_count',
-                           'repost_count', 'reply_count', 'like_count', 'quote_count',
-                           'impression_count', 'bookmark_count']:
+                elif key in ['repost_count', 'reply_count', 'like_count', 'quote_count',
+                           'impression_count', 'bookmark_count'] + USER_COUNT_FIELDS:
                     try:
                         default_data[key] = int(float(value)) if value is not None else 0
                     except:
                         default_data[key] = 0
-                elif key == 'user_verified':
-                    if isinstance(value, bool):
-                        default_data[key] = value
-                    elif isinstance(value, str):
-                        default_data[key] = value.lower() == 'true'
-                    else:
-                        default_data[key] = bool(value)
                 elif key == 'is_checkworthy':
                     if isinstance(value, bool):
                         default_data[key] = value
@@ -189,10 +311,18 @@ class PostData:
         elif default_data.get('text') and not default_data.get('post_text'):
             default_data['post_text'] = default_data['text']
         
-        return cls(**default_data)
+        return cls(user=user, **default_data)
+
+def clean_post_id(post_id: Any) -> str:
+    """Strip synthetic prefixes (e.g. original_ngt_, generated_gt_) and return the numeric tweet id"""
+    raw_id = re.sub(r"^(original_ngt_|generated_gt_)", "", str(post_id))
+    # Extract numeric portion of the post ID (fallback to raw if no match)
+    match = re.search(r"\d{5,}", raw_id)  # long numeric chunk
+    return match.group(0) if match else raw_id
 
-def parse_display_output(file_path: str) -> List[tuple[PresentationData, PostData]]:
+def parse_display_output(file_path: str, users: Optional[UserRegistry] = None) -> List[tuple[PresentationData, PostData]]:
     """Parse the display_output.csv file and return a list of tuples containing presentation and post data"""
+    users = users if users is not None else UserRegistry()
     try:
         # Read CSV with custom quoting to handle nested quotes
         df = pd.read_csv(file_path)
@@ -250,7 +380,7 @@ def parse_display_output(file_path: str) -> List[tuple[PresentationData, PostDat
                             post_dict[key] = 0.0
                 
                 # Use dataclass parser for base fields
-                post = PostData.parse_from_dict(post_dict)
+                post = PostData.parse_from_dict(post_dict, users)
 
                 # Attach any additional fields that the dataclass might not yet define so that the
                 # Streamlit UI does not break when trying to access them.
@@ -0,0 +1,126 @@
+import pytest
+
+from aggregates import AggregateStore, UNCLUSTERED, UNKNOWN_DAY
+from local_store import LocalStore
+from parsers import PostData, PresentationData, PostFindings, FactCheckerRecommendations
+
+def make_post(post_id, priority=0.5, likes=0, user_name='Alice', text='', **extra):
+    return PostData.parse_from_dict({
+        'post_id': post_id,
+        'text': text,
+        'like_count': likes,
+        'priority_score': priority,
+        'user_name': user_name,
+        'user_created_at': '2020-01-01 00:00:00+00:00',
+        **extra,
+    })
+
+def make_presentation(title='title'):
+    return PresentationData(title=title, key_findings=PostFindings(findings=[]),
+                            recommended_actions=FactCheckerRecommendations(recommendations=[]),
+                            process='', status='')
+
+def make_claim(claim_id, post_id, cluster, urgency='Not urgent', amplifiability='Low'):
+    return {'claim_id': claim_id, 'post_id': post_id, 'assigned_cluster': cluster,
+            'classification': {'perceived_response_urgency': urgency},
+            'amplifiability': {'amplifiability_prediction': amplifiability}}
+
+def test_rollups_per_dimension():
+    aggregates = AggregateStore()
+    aggregates.add(make_post('1', priority=0.4, likes=10, text='#Vote now #obi'))
+    aggregates.add(make_post('2', priority=0.8, likes=5, text='#vote'))
+    aggregates.add(make_post('3', priority=0.6, likes=1, user_name='Bob'))
+
+    totals = aggregates.get_totals()
+    assert totals.count == 3
+    assert totals.sums['like_count'] == 16
+    vote = aggregates.get('hashtag', 'vote')
+    assert vote.count == 2
+    assert vote.max_priority == 0.8
+    assert aggregates.get('hashtag', 'obi').count == 1
+    alice = aggregates.user_rollup(make_post('x'))
+    assert alice.count == 2
+    assert alice.mean('priority_score') == pytest.approx(0.6)
+    # Analysed posts carry no cluster or date; those rollups come from update_claims
+    assert not aggregates.rollups['cluster'] and not aggregates.rollups['day']
+
+def test_unchanged_post_is_skipped_and_changed_post_replaces_old_values():
+    aggregates = AggregateStore()
+    assert aggregates.add(make_post('1', priority=0.9, likes=10, text='#a'))
+    assert not aggregates.add(make_post('1', priority=0.9, likes=10, text='#a'))
+    assert aggregates.get_totals().count == 1
+
+    assert aggregates.add(make_post('1', priority=0.3, likes=4, text='#b'))
+    totals = aggregates.get_totals()
+    assert totals.count == 1
+    assert totals.sums['like_count'] == 4
+    assert totals.max_priority == 0.3
+    assert 'a' not in aggregates.rollups['hashtag']
+    assert aggregates.get('hashtag', 'b').count == 1
+
+def test_claim_posts_count_in_every_cluster_and_day():
+    aggregates = AggregateStore()
+    posts = [{'post_id': '1617619263392743424', 'date': '2023-01-23 10:00:00', 'favorites': 4, 'retweets': 1},
+             {'post_id': '42424242', 'date': '2023-02-02 08:00:00', 'favorites': 2, 'retweets': 0},
+             {'post_id': '99999999', 'date': None, 'favorites': 0, 'retweets': 0}]
+    claims = [make_claim('c1', '1617619263392743424', 'campaign', 'Very urgent', 'High'),
+              make_claim('c2', '1617619263392743424', 'security'),
+              make_claim('c3', '42424242', 'campaign', 'Moderately urgent', 'Low')]
+    assert aggregates.update_claims(posts, claims) == 3
+
+    assert aggregates.get('cluster', 'campaign').count == 2
+    assert aggregates.get('cluster', 'security').count == 1
+    assert aggregates.get('cluster', UNCLUSTERED).count == 1
+    assert aggregates.get('day', '2023-01-23').count == 1
+    assert aggregates.get('day', UNKNOWN_DAY).count == 1
+    assert aggregates.has_clusters() and aggregates.has_days()
+    # Post priority is the mean of its strongest urgency and amplifiability levels
+    assert aggregates.get('cluster', 'campaign').mean('priority_score') == pytest.approx((1.0 + 0.25) / 2)
+    assert aggregates.cluster_priority(make_post('original_ngt_1617619263392743424')) == 1.0
+    # Claim-backed posts only feed the cluster and day rollups
+    assert aggregates.get_totals().count == 0
+
+    # Moving a claim to another cluster re-keys only that post
+    claims[1] = make_claim('c2', '1617619263392743424', 'economy')
+    assert aggregates.update_claims(posts, claims) == 1
+    assert 'security' not in aggregates.rollups['cluster']
+    assert aggregates.get('cluster', 'economy').count == 1
+
+def test_prune_retracts_missing_posts():
+    aggregates = AggregateStore()
+    aggregates.update([(make_presentation(), make_post('1')), (make_presentation(), make_post('2'))])
+    aggregates.update([(make_presentation(), make_post('2'))], prune=True)
+    assert aggregates.get_totals().count == 1
+    assert set(aggregates.contributions) == {('display', '2')}
+
+def test_sync_reads_only_new_revisions():
+    store = LocalStore(':memory:')
+    aggregates = AggregateStore()
+    store.save_display_output([(make_presentation(), make_post('1', priority=0.7))])
+    assert aggregates.sync(store) == 1
+    assert aggregates.sync(store) == 0
+
+    store.save_display_output([(make_presentation(), make_post('2', priority=0.2))])
+    assert aggregates.sync(store) == 1
+    assert aggregates.get_totals().count == 2
+
+    # A replaced table starts a new generation: missing posts are retracted
+    store.replace_display_output([(make_presentation(), make_post('2', priority=0.2))])
+    aggregates.sync(store)
+    assert set(aggregates.contributions) == {('display', '2')}
+    assert aggregates.get_totals().max_priority == 0.2
+
+def test_sync_rekeys_posts_when_claims_change():
+    store = LocalStore(':memory:')
+    aggregates = AggregateStore()
+    store.insert_rows('posts', [{'post_id': '1', 'date': '2023-01-23 10:00:00'},
+                                {'post_id': '2', 'date': '2023-01-24 10:00:00'}])
+    store.insert_rows('clustered_claims', [make_claim('c1', '1', 'campaign')])
+    assert aggregates.sync(store) == 2
+    assert aggregates.sync(store) == 0
+    assert aggregates.get('cluster', 'campaign').count == 1
+
+    store.insert_rows('clustered_claims', [make_claim('c2', '2', 'campaign')])
+    assert aggregates.sync(store) == 1
+    assert aggregates.get('cluster', 'campaign').count == 2
+    assert UNCLUSTERED not in aggregates.rollups['cluster']
@@ -0,0 +1,90 @@
+import os
+
+from local_store import LocalStore
+from parsers import (PostData, PresentationData, PostFindings, KeyFinding,
+                     FactCheckerRecommendations, RecommendedAction, UserRegistry)
+
+def make_pair(post_id, text, priority, user_name='Alice'):
+    presentation = PresentationData(
+        title=f"Title {post_id}",
+        key_findings=PostFindings(findings=[KeyFinding(type='Claim', description=f"About {post_id}")]),
+        recommended_actions=FactCheckerRecommendations(
+            recommendations=[RecommendedAction(action='Verify', rationale='High reach')]
+        ),
+        process='Presentation completed',
+        status='success',
+    )
+    post = PostData.parse_from_dict({
+        'post_id': post_id,
+        'text': text,
+        'priority_score': priority,
+        'user_name': user_name,
+        'user_created_at': '2019-04-28 12:17:35+00:00',
+        'user_description': 'We report 🇳🇬',
+    }, UserRegistry())
+    # Extra display_output field, attached the way parse_display_output does
+    post.retweets = 3.0
+    return presentation, post
+
+def make_store():
+    store = LocalStore(':memory:')
+    store.save_display_output([
+        make_pair('1', 'Peter Obi rally in Lagos', 0.9),
+        make_pair('2', 'ÉLECTION results announced', 0.5, user_name='Bob'),
+        make_pair('3', 'Atiku visits Kano', 0.65),
+    ])
+    return store
+
+def test_round_trip():
+    store = make_store()
+    loaded = store.load_display_output()
+    assert [post.post_id for _, post in loaded] == ['1', '3', '2']
+
+    presentation, post = loaded[0]
+    assert presentation.title == 'Title 1'
+    assert presentation.key_findings.findings == [KeyFinding(type='Claim', description='About 1')]
+    assert presentation.recommended_actions.recommendations[0].action == 'Verify'
+    assert post.user_name == 'Alice'
+    assert post.user_description == 'We report 🇳🇬'
+    assert post.retweets == 3.0
+
+def test_filters_are_pushed_down():
+    store = make_store()
+    assert [p.post_id for _, p in store.load_display_output(min_values={'priority_score': 0.6})] == ['1', '3']
+    assert [p.post_id for _, p in store.load_display_output(max_values={'priority_score': 0.6})] == ['2']
+    assert [p.post_id for _, p in store.load_display_output(filters={'post_id': ['2', '3']})] == ['3', '2']
+    assert [p.post_id for _, p in store.load_display_output(limit=1)] == ['1']
+
+def test_search_is_unicode_case_insensitive_regex():
+    store = make_store()
+    assert [p.post_id for _, p in store.load_display_output(search=('text', 'élection'))] == ['2']
+    assert [p.post_id for _, p in store.load_display_output(search=('text', 'obi|atiku'))] == ['1', '3']
+    # Invalid regexes fall back to a literal match instead of failing
+    assert store.load_display_output(search=('text', 'obi (')) == []
+
+def test_duplicate_post_ids_keep_every_row():
+    store = LocalStore(':memory:')
+    store.save_display_output([make_pair('1', 'first', 0.4), make_pair('1', 'second', 0.3)])
+    assert [p.text for _, p in store.load_display_output()] == ['first', 'second']
+
+def test_refresh_reseeds_only_when_source_changes(tmp_path):
+    source = tmp_path / 'display_output.csv'
+    source.write_text('post,presentation\n')
+    store = LocalStore(str(tmp_path / 'store.db'))
+    assert store.refresh_display_output(str(source))
+    assert not store.refresh_display_output(str(source))
+
+    stat = source.stat()
+    source.write_text('post,presentation\n\n')
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert store.refresh_display_output(str(source))
+    assert store.display_output_version()[1] == 2
+
+def test_bad_row_only_loses_itself():
+    store = LocalStore(':memory:')
+    rows = [{'post_id': '1', 'hashtags': ['a']},
+            {'post_id': '2', 'hashtags': {object()}},  # not JSON serialisable
+            {'post_id': '3', 'hashtags': []}]
+    inserted = store.insert_rows('posts', rows, batch_size=2)
+    assert [row['post_id'] for row in inserted] == ['1', '3']
+    assert store.count('posts') == 2
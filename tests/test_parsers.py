@@ -0,0 +1,55 @@
+from parsers import PostData, UserRegistry
+
+def test_same_author_shares_one_interned_profile():
+    users = UserRegistry()
+    first = PostData.parse_from_dict({'post_id': '1', 'user_name': 'Reuben Abati',
+                                      'user_created': '2012-06-04 06:40:07+00:00',
+                                      'user_description': 'Journalist', 'user_followers': 886602}, users)
+    second = PostData.parse_from_dict({'post_id': '2', 'user_name': 'Reuben' + ' Abati',
+                                       'user_created': '2012-06-04 06:40:07+00:00',
+                                       'user_description': 'Journalist', 'user_followers': 886610}, users)
+    assert first.user is second.user
+    assert len(users) == 1
+    assert first.user_description == 'Journalist'
+    assert first.user_name is second.user_name
+    # Counts that change over time stay on each post
+    assert (first.user_followers, second.user_followers) == (886602, 886610)
+    assert second.user_followers_count == 886610
+
+def test_same_name_with_different_creation_time_is_a_different_user():
+    users = UserRegistry()
+    a = users.intern({'user_name': 'NigerianVoice', 'user_created': '2021-05-15 10:30:00'})
+    b = users.intern({'user_name': 'NigerianVoice', 'user_created': '2021-05-15 14:30:00'})
+    assert a is not b
+    assert len(users) == 2
+
+def test_handle_takes_precedence_over_name():
+    users = UserRegistry()
+    a = users.intern({'user_handle': 'peterobi', 'user_name': 'Peter Obi', 'user_created_at': '2010'})
+    assert a.identity == 'peterobi'
+    assert a.key.startswith('peterobi#')
+    assert users.intern({'user_handle': 'peterobi', 'user_name': 'Peter Obi', 'user_created_at': '2010'}) is a
+
+def test_changed_profile_is_a_new_version_of_the_same_user():
+    users = UserRegistry()
+    old = PostData.parse_from_dict({'post_id': '1', 'user_name': 'Reuben Abati',
+                                    'user_created': '2012-06-04 06:40:07+00:00',
+                                    'user_description': 'Journalist'}, users)
+    new = PostData.parse_from_dict({'post_id': '2', 'user_name': 'Reuben Abati',
+                                    'user_created': '2012-06-04 06:40:07+00:00',
+                                    'user_description': 'Journalist, TV host'}, users)
+    again = PostData.parse_from_dict({'post_id': '3', 'user_name': 'Reuben Abati',
+                                      'user_created': '2012-06-04 06:40:07+00:00',
+                                      'user_description': 'Journalist'}, users)
+    # Each post keeps the profile it was scraped with; identical profiles are stored once
+    assert (old.user_description, new.user_description) == ('Journalist', 'Journalist, TV host')
+    assert old.user.key != new.user.key
+    assert old.user.identity == new.user.identity
+    assert again.user is old.user
+    assert len(users) == 2
+
+def test_parse_without_registry_does_not_share_state():
+    a = PostData.parse_from_dict({'post_id': '1', 'user_name': 'X', 'user_location': 'Lagos'})
+    b = PostData.parse_from_dict({'post_id': '2', 'user_name': 'X', 'user_location': 'Abuja'})
+    assert a.user is not b.user
+    assert b.user_location == 'Abuja'